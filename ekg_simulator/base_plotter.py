@@ -0,0 +1,200 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+import numpy as np
+from .ring_buffer import RingBuffer
+
+# Annotation text helpers. Arguments are the values rounded to the displayed
+# precision (e.g. K+ in tenths), so steady values reuse the cached string
+# instead of being formatted again on every refresh.
+@lru_cache(maxsize=256)
+def _hr_text(hr_bpm):
+    return f'HR: {hr_bpm} bpm'
+
+@lru_cache(maxsize=256)
+def _st_elevation_text(st_hundredths_mv):
+    return f'ST Elev: {st_hundredths_mv / 100:.2f} mV (AGE?)'
+
+@lru_cache(maxsize=256)
+def _st_depression_text(st_hundredths_mv):
+    return f'ST Dep: {st_hundredths_mv / 100:.2f} mV'
+
+@lru_cache(maxsize=256)
+def _icp_text(icp_mmhg):
+    return f'TBI | ICP: {icp_mmhg} mmHg'
+
+@lru_cache(maxsize=256)
+def _k_text(k_tenths_meq_l, suffix):
+    return f'K+: {k_tenths_meq_l / 10:.1f} mEq/L{suffix}'
+
+@lru_cache(maxsize=256)
+def _ca_text(ca_tenths_mg_dl, suffix):
+    return f'Ca: {ca_tenths_mg_dl / 10:.1f} mg/dL{suffix}'
+
+@lru_cache(maxsize=256)
+def _temp_text(temp_tenths_c, suffix):
+    return f'Temp: {temp_tenths_c / 10:.1f}°C{suffix}'
+
+# Electrolyte and temperature readouts: np.searchsorted over the thresholds gives
+# a state code that indexes (shown in the alert block, text suffix).
+# Potassium is abnormal above its threshold (side='left' keeps 5.5 itself normal),
+# calcium and temperature below theirs (side='right' keeps the threshold normal).
+_K_THRESHOLDS = np.array([5.5])
+_K_STYLES = ((False, ''), (True, ' (High)'))
+_CA_THRESHOLDS = np.array([8.5])
+_CA_STYLES = ((True, ' (Low)'), (False, ''))
+_TEMP_THRESHOLDS = np.array([35.0])
+_TEMP_STYLES = ((True, ' (Low)'), (False, ''))
+
+class BasePlotter(ABC):
+    def __init__(self, ekg_simulator_instance):
+        """
+        Common interface and shared state for the real-time EKG display backends.
+        Subclasses provide the drawing; buffering of the EKG trace and formatting
+        of the physiological annotations are shared here.
+        """
+        self.ekg_simulator_instance = ekg_simulator_instance
+        self.display_seconds = 10  # Default display duration
+        self.sampling_rate = 100 # Default sampling rate
+        # Ring buffer holding the most recent display window of EKG samples.
+        # Allocated in setup_plot once display_seconds and sampling_rate are known.
+        self._buffer = None
+        self._time_full = None # Static x-axis values for a full display window
+        self._display = None # Persistent array the ring buffer is unrolled into for drawing
+        # Last text shown by each annotation, keyed by annotation name
+        self._last_annotations = {}
+        self.annotation_update_interval = 5 # Refresh annotations every N animation frames
+        self._frame_count = 0
+        self._ylim = (-2.0, 2.0) # Y-axis limits currently shown, adjusted for potential scaled QRS
+
+    @abstractmethod
+    def setup_plot(self, num_leads=1, sampling_rate=100):
+        """
+        Creates the display. Implementations should call _setup_buffer once
+        sampling_rate is set.
+        """
+
+    @abstractmethod
+    def start_animation(self):
+        """
+        Shows the display and runs the update loop until the window is closed.
+        """
+
+    @abstractmethod
+    def _draw_annotation(self, key, text):
+        """
+        Shows new text in the 'status' or 'alert' annotation.
+        """
+
+    def _setup_buffer(self):
+        """
+        Preallocates the ring buffer and the static time vector for one display window.
+        """
+        max_points = int(self.display_seconds * self.sampling_rate)
+        self._buffer = RingBuffer(max_points)
+        self._display = np.empty(max_points, dtype=np.float32)
+        # The x-axis grid is fixed for a given window, so build it once here
+        self._time_full = np.linspace(0, self.display_seconds, max_points, endpoint=False, dtype=np.float32)
+
+    def push(self, segment):
+        """
+        Appends a new EKG segment to the display buffer (oldest samples are overwritten).
+        """
+        self._buffer.append(segment)
+
+    def set_annotations(self, ps):
+        """
+        Rebuilds the status and alert annotation blocks from the physiological state.
+        """
+        # Fetch current physiological parameters
+        current_hr = ps.heart_rate_bpm
+        current_st = ps.st_depression_mv
+        tension_pneumothorax_present = ps.tension_pneumothorax_present
+        tbi_present = ps.tbi_present
+        icp_mmhg = ps.icp_mmhg
+        blast_injury_present = ps.blast_injury_present
+        st_elevation_mv = ps.st_elevation_mv
+        st_depression_mv = current_st
+        serum_k_meq_l = ps.serum_k_meq_l
+        serum_ca_mg_dl = ps.serum_ca_mg_dl
+        temp_c = ps.core_body_temperature_celsius
+        osborn_expected = ps.osborn_wave_present
+        ket_active = ps.ketamine_active
+        morph_active = ps.morphine_active
+
+
+        # Build the annotation blocks: each value goes to the status block,
+        # or to the alert block when it is abnormal
+        status_lines = [_hr_text(int(round(current_hr)))]
+        alert_lines = []
+
+        if st_elevation_mv > 0:
+            alert_lines.append(_st_elevation_text(round(st_elevation_mv * 100)))
+        elif st_depression_mv > 0:
+            status_lines.append(_st_depression_text(round(st_depression_mv * 100)))
+
+        if tension_pneumothorax_present:
+            alert_lines.append('Tension Pneumo')
+        if tbi_present:
+            alert_lines.append(_icp_text(icp_mmhg))
+        if blast_injury_present:
+            alert_lines.append('Blast Injury')
+
+        is_alert, suffix = _K_STYLES[int(np.searchsorted(_K_THRESHOLDS, serum_k_meq_l, side='left'))]
+        (alert_lines if is_alert else status_lines).append(_k_text(round(serum_k_meq_l * 10), suffix))
+
+        is_alert, suffix = _CA_STYLES[int(np.searchsorted(_CA_THRESHOLDS, serum_ca_mg_dl, side='right'))]
+        (alert_lines if is_alert else status_lines).append(_ca_text(round(serum_ca_mg_dl * 10), suffix))
+
+        is_alert, suffix = _TEMP_STYLES[int(np.searchsorted(_TEMP_THRESHOLDS, temp_c, side='right'))]
+        (alert_lines if is_alert else status_lines).append(_temp_text(round(temp_c * 10), suffix))
+
+        if osborn_expected:
+            alert_lines.append('Osborn Waves Expected')
+
+        if ket_active:
+            status_lines.append('Ketamine Active')
+        if morph_active:
+            status_lines.append('Morphine Active')
+
+        # Update annotations (only drawn when the text changed)
+        self._set_annotation('status', '\n'.join(status_lines))
+        self._set_annotation('alert', '\n'.join(alert_lines))
+
+    def _set_annotation(self, key, text):
+        """
+        Draws an annotation's text, skipping the backend when the text is unchanged since the last update.
+        """
+        if text != self._last_annotations.get(key):
+            self._draw_annotation(key, text)
+            self._last_annotations[key] = text
+
+    def _next_ylim(self):
+        """
+        Returns the y-axis limits for the next frame, based on the QRS amplitude factor.
+        This is a simple way to try and keep the scaled waveform visible.
+        """
+        current_qrs_amplitude_factor = self.ekg_simulator_instance.physiological_state.qrs_amplitude_factor
+        if current_qrs_amplitude_factor < 0.7: # Example threshold
+            return (-1.0 * current_qrs_amplitude_factor * 2, 1.0 * current_qrs_amplitude_factor * 2)
+        if self._ylim[1] < 1.5: # Reset if it was shrunk and factor is back to normal
+            return (-1.5, 1.5)
+        return self._ylim
+
+    def _poll_simulator(self):
+        """
+        Called once per animation frame. Pulls new data from the simulator into the
+        display buffer and refreshes the annotations when due.
+        Returns True if new samples were added to the buffer.
+        """
+        # Get data from the EKG simulator instance
+        new_data_segment = self.ekg_simulator_instance.get_latest_ekg_data()
+        has_new_data = new_data_segment is not None and len(new_data_segment) > 0
+        if has_new_data:
+            self.push(new_data_segment)
+
+        # Physiological values change over seconds, so the annotations are only
+        # refreshed every few frames while the trace updates on every frame
+        if self._frame_count % self.annotation_update_interval == 0:
+            self.set_annotations(self.ekg_simulator_instance.physiological_state)
+        self._frame_count += 1
+        return has_new_data
@@ -6,6 +6,8 @@ if __name__ == "__main__":
     """
     print("Starting EKG Simulator...")
     simulator = EKGSimulator()
+    # For the faster OpenGL display (requires vispy and a GUI backend such as PyQt5):
+    # simulator = EKGSimulator(plotter_backend='vispy')
     
     # Configure simulation parameters if needed, e.g.:
     # simulator.sampling_rate = 100 # Hz
@@ -24,7 +26,14 @@ if __name__ == "__main__":
         print("EKG Simulator finished or was interrupted.")
 
 # To run this simulator, you might need to install dependencies:
-# pip install numpy matplotlib neurokit2
+# pip install numpy matplotlib numba
+#
+# numba JIT-compiles the simulation kernels, including the ECGSYN model used to
+# build the beat templates. Without numba, the templates are generated with neurokit2 instead:
+# pip install neurokit2
+#
+# The 'vispy' plotter backend additionally needs:
+# pip install vispy pyqt5
 #
 # If you encounter issues with Matplotlib backends, especially on servers
 # or environments without a display, you might need to install a backend like TkAgg:
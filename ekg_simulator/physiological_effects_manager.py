@@ -1,25 +1,251 @@
+from functools import lru_cache
 import numpy as np
+from .numba_compat import njit
+
+# Random generator for the physiological variability (e.g. the shock heart rate).
+# A Generator is faster per draw than the legacy np.random functions and does not
+# share the global RandomState with the rest of the program.
+_RNG = np.random.default_rng()
+# The shock heart rate is drawn from this many evenly spaced levels within its class
+# range, so that the memoized kernel results repeat
+_SHOCK_HR_DRAW_LEVELS = 16
+
+# Baseline EKG parameters. Most values are derived or passed in the physiological state.
+_BASELINE_QRS = 1.0
+# Resting heart rate that the hypovolemic shock multipliers are applied to.
+# The current heart rate is already the previous tick's target, so scaling it
+# would compound the tachycardia on every tick.
+_BASELINE_HEART_RATE = 70
+
+# Hypovolemic shock classes by blood volume percent, looked up with np.searchsorted.
+# Class IV: < 60, Class III: 60-75, Class II: 75-90 (inclusive), Class I: > 90.
+# The last threshold is nudged just above 90 so that exactly 90% is still Class II.
+_SHOCK_THRESHOLDS = np.array([60.0, 75.0, np.nextafter(90.0, np.inf)])
+# One row per class (IV, III, II, I): (HR multiplier low, HR multiplier high, ST depression mV)
+_SHOCK_CLASSES = np.array([
+    [1.4, 1.7, 0.2],   # Class IV: Severe shock
+    [1.2, 1.4, 0.1],   # Class III: Moderate shock
+    [1.1, 1.2, 0.05],  # Class II: Mild shock
+    [1.0, 1.0, 0.0],   # Class I: No significant change
+])
+# Stored as (HR multiplier low, HR multiplier span, ST depression mV) so the kernel
+# resolves a class with a single row read and one multiply-add
+_SHOCK_TABLE = np.column_stack((_SHOCK_CLASSES[:, 0],
+                                _SHOCK_CLASSES[:, 1] - _SHOCK_CLASSES[:, 0],
+                                _SHOCK_CLASSES[:, 2]))
+
+# Electrolyte and temperature effects, also looked up with np.searchsorted.
+# Hyperkalemia rows: (T-wave amplitude floor, HR cap bpm)
+# "No cap" is a large finite value rather than np.inf: the kernel is compiled with
+# fastmath, which lets the compiler assume no value is infinite.
+_NO_HR_CAP = 1e9
+_K_THRESHOLDS = np.array([5.5, 6.5, 7.5])
+_K_TABLE = np.array([
+    [0.0, _NO_HR_CAP], # Normal potassium: no change
+    [1.5, _NO_HR_CAP], # Mild Hyperkalemia
+    [2.0, 70],         # Moderate Hyperkalemia
+    [2.5, 60],         # Severe Hyperkalemia
+])
+# Hypocalcemia rows: QT floor ms (the normal calcium row leaves QT unchanged)
+_CA_THRESHOLDS = np.array([7.0, 8.5])
+_CA_TABLE = np.array([520.0, 480.0, 0.0]) # Severe, Mild, Normal
+# Hypothermia thresholds are descending, so they are stored negated (< 35, < 32, < 28 C).
+# Rows: (HR cap bpm, PR floor ms, QRS floor ms, QT floor ms)
+_TEMP_THRESHOLDS = -np.array([35.0, 32.0, 28.0])
+_TEMP_TABLE = np.array([
+    [0, 0, 0, 0],            # Normothermia: no change
+    [60, 220, 110, 480],     # Mild Hypothermia
+    [50, 240, 120, 500],     # Moderate Hypothermia
+    [40, 280, 140, 550],     # Severe Hypothermia
+], dtype=np.float64)
+
+@njit(cache=True, fastmath=True)
+def _compute_targets(shock_class, current_heart_rate, baseline_heart_rate, shock_hr_draw,
+                     baseline_qrs_amplitude_factor, shock_table,
+                     k_thresholds, k_table, ca_thresholds, ca_table, temp_thresholds, temp_table,
+                     tension_pneumothorax_present, tbi_present, icp_mmhg,
+                     blast_injury_present, coronary_age_suspected,
+                     t_wave_amplitude_factor, qt_duration_ms, st_elevation_mv,
+                     pr_interval_ms, qrs_duration_ms,
+                     serum_k, serum_ca_mg_dl, temp_c, ketamine_active, morphine_active):
+    """
+    Scalar kernel behind PhysiologicalEffectsManager.update_ekg_parameters.
+    Takes the physiological state as plain scalars so it can be compiled by numba.
+    shock_class indexes shock_table (from np.searchsorted over the blood volume thresholds).
+    shock_hr_draw is a random number in [0, 1) that places the shock heart rate
+    within its class range.
+    Returns (heart_rate, st_depression_mv, qrs_amplitude_factor, t_wave_amplitude_factor,
+    qt_duration_ms, st_elevation_mv, pr_interval_ms, qrs_duration_ms, osborn_wave_present).
+    """
+    # PR and QRS start from their current values; only hypothermia changes them
+    target_pr_interval_ms = pr_interval_ms
+    target_qrs_duration_ms = qrs_duration_ms
+
+    # Hypovolemic shock: one lookup picks the class row, one multiply-add places the
+    # heart rate within the class range
+    shock_row = shock_table[shock_class]
+    target_heart_rate = baseline_heart_rate * (shock_row[0] + shock_row[1] * shock_hr_draw)
+    target_st_depression_mv = shock_row[2]
+    
+    # Tension Pneumothorax Logic
+    # This is applied *after* hypovolemia effects on HR, potentially overriding/enhancing them.
+    if tension_pneumothorax_present:
+        # Increase HR significantly due to tension pneumothorax
+        # Using max ensures it's at least the shock-induced HR or the pneumo-induced HR.
+        # The problem states: target_heart_rate = max(target_heart_rate, physiological_state.heart_rate_bpm * 1.5)
+        # Here, physiological_state.heart_rate_bpm is the *current* HR, not necessarily the original baseline.
+        # It's better to use the target_heart_rate calculated from hypovolemia as the base for this comparison.
+        pneumo_hr_effect = current_heart_rate * 1.5 # Tentative HR if pneumo was the ONLY factor on baseline
+        target_heart_rate = max(target_heart_rate, pneumo_hr_effect) 
+        target_heart_rate = max(target_heart_rate, 120) # Ensure it's at least 120 as a minimum for pneumo.
+        
+        target_qrs_amplitude_factor = 0.5  # Low voltage
+    else:
+        target_qrs_amplitude_factor = baseline_qrs_amplitude_factor # Normal voltage
+
+    # TBI/ICP Logic
+    target_t_wave_amplitude_factor = t_wave_amplitude_factor
+    target_qt_duration_ms = qt_duration_ms
+    # Initialize st_elevation_mv which might be set by blast injury logic
+    target_st_elevation_mv = st_elevation_mv
+
+
+    if tbi_present and icp_mmhg > 20:
+        # Bradycardia (Cushing Reflex)
+        # Ensure HR is low but not below a certain floor (e.g. 40), and respects other conditions.
+        # min(target_heart_rate, 55) will try to bring HR down if it's higher.
+        # max(40, ...) ensures it doesn't go too low.
+        target_heart_rate = max(40, min(target_heart_rate, 55))
+        
+        target_t_wave_amplitude_factor = 2.0  # Prominent T-waves
+        target_qt_duration_ms = 500  # QT Prolongation
+    else:
+        # Reset to baseline or current state if TBI/ICP condition not met
+        # This should ideally not overwrite if another condition (like blast) is setting them
+        if not blast_injury_present or not coronary_age_suspected: # check if blast is not setting T-wave
+            target_t_wave_amplitude_factor = 1.0 
+        # Similar check for QT
+        if not blast_injury_present or not coronary_age_suspected: # check if blast is not setting QT
+            target_qt_duration_ms = qt_duration_ms # or a more dynamic baseline
+
+    # Blast Injury/AGE Logic
+    # Initialize target_st_elevation_mv, default to current state or 0
+    # target_st_elevation_mv is already initialized above using st_elevation_mv
+    
+    if blast_injury_present and \
+       coronary_age_suspected:
+        
+        # Tachycardia for AGE
+        target_heart_rate = max(target_heart_rate, 110) 
+        
+        # ST Elevation for MI-like pattern
+        target_st_elevation_mv = 0.2 
+        
+        # Precedence Logic: ST elevation overrides ST depression
+        if target_st_elevation_mv > 0:
+            target_st_depression_mv = 0.0
+    else:
+        # If AGE is not suspected, st_elevation_mv should be 0 unless another condition sets it.
+        # For now, assume only AGE causes elevation.
+        target_st_elevation_mv = 0.0 
+        # target_st_depression_mv would have been determined by hypovolemia logic earlier,
+        # and should not be overridden here unless blast/AGE was active and is now not.
+
+    # Hyperkalemia Logic
+    # Row 0 is normal potassium, each higher row is one threshold exceeded (> 5.5, > 6.5, > 7.5)
+    # target_t_wave_amplitude_factor is already initialized from previous logic or state
+    k_class = np.searchsorted(k_thresholds, serum_k, side='left')
+    target_t_wave_amplitude_factor = max(target_t_wave_amplitude_factor, k_table[k_class, 0])
+    target_heart_rate = min(target_heart_rate, k_table[k_class, 1]) # Bradycardic effect
+
+    # Hypocalcemia Logic
+    # target_qt_duration_ms is already initialized from previous logic (e.g. TBI) or state
+    # Row 0 is severe (< 7.0), row 1 mild (< 8.5) hypocalcemia, the last row normal calcium
+    ca_class = np.searchsorted(ca_thresholds, serum_ca_mg_dl, side='right')
+    
+    # Use the current physiological_state's qt_duration_ms as the baseline for max comparison
+    # This ensures that if another condition (like TBI) has already prolonged QT, 
+    # hypocalcemia will only make it longer if its effect is greater.
+    if ca_class < len(ca_thresholds):
+        target_qt_duration_ms = max(qt_duration_ms, ca_table[ca_class])
+    # Else (Normal Calcium): target_qt_duration_ms remains as determined by other conditions or baseline
+
+    # Hypothermia Logic
+    # The thresholds are descending (< 35, < 32, < 28), so they are stored negated and searched
+    # with the negated temperature. Row 0 is normothermia, each higher row one level colder;
+    # the coldest level reached overrides the milder ones.
+    temp_class = np.searchsorted(temp_thresholds, -temp_c, side='left')
+    target_osborn_wave_present = bool(temp_class > 0)
+
+    # Use current physiological_state values as baseline for max comparisons for intervals
+    # This is critical to ensure hypothermia only prolongs if its effect is greater than existing conditions.
+    if temp_class > 0:
+        target_heart_rate = min(target_heart_rate, temp_table[temp_class, 0])
+        target_pr_interval_ms = max(target_pr_interval_ms, temp_table[temp_class, 1])
+        target_qrs_duration_ms = max(target_qrs_duration_ms, temp_table[temp_class, 2])
+        target_qt_duration_ms = max(qt_duration_ms, temp_table[temp_class, 3])
+
+    # Drug Effects Logic
+    ketamine_effect_hr_increase = 20
+    morphine_effect_hr_decrease = 15
+
+    if ketamine_active:
+        target_heart_rate += ketamine_effect_hr_increase
+    
+    if morphine_active:
+        target_heart_rate -= morphine_effect_hr_decrease
+    
+    # Clamping Heart Rate after all effects are applied (the only cap), then rounding it
+    # to an integer, half up since the heart rate is always positive. All the effects
+    # above use whole-bpm limits and offsets, so rounding once here is the same as
+    # rounding before them.
+    target_heart_rate = int(max(30, min(target_heart_rate, 220)) + 0.5)
+
+
+    return (target_heart_rate, target_st_depression_mv, target_qrs_amplitude_factor,
+            target_t_wave_amplitude_factor, target_qt_duration_ms, target_st_elevation_mv,
+            target_pr_interval_ms, target_qrs_duration_ms, target_osborn_wave_present)
+
+@lru_cache(maxsize=4096)
+def _cached_targets(key):
+    """
+    Evaluates the compiled _compute_targets kernel for a state key built by
+    PhysiologicalEffectsManager.update_ekg_parameters. Results are memoized on the
+    rounded state, so while the state is steady an update is a single dictionary lookup.
+    """
+    (shock_class, current_heart_rate, shock_hr_draw,
+     tension_pneumothorax_present, tbi_present, icp_mmhg,
+     blast_injury_present, coronary_age_suspected,
+     t_wave_amplitude_factor, qt_duration_ms, st_elevation_mv,
+     pr_interval_ms, qrs_duration_ms,
+     serum_k, serum_ca_mg_dl, temp_c, ketamine_active, morphine_active) = key
+    return _compute_targets(
+        shock_class, current_heart_rate, float(_BASELINE_HEART_RATE), shock_hr_draw,
+        float(_BASELINE_QRS), _SHOCK_TABLE,
+        _K_THRESHOLDS, _K_TABLE, _CA_THRESHOLDS, _CA_TABLE,
+        _TEMP_THRESHOLDS, _TEMP_TABLE,
+        tension_pneumothorax_present, tbi_present, icp_mmhg,
+        blast_injury_present, coronary_age_suspected,
+        t_wave_amplitude_factor, qt_duration_ms, st_elevation_mv,
+        pr_interval_ms, qrs_duration_ms,
+        serum_k, serum_ca_mg_dl, temp_c, ketamine_active, morphine_active)
 
 class PhysiologicalEffectsManager:
-    def __init__(self):
-        """
-        Manages the physiological effects on EKG parameters.
-        """
-        # Can store default or baseline EKG parameters if needed,
-        # but for now, most are derived or passed in physiological_state.
-        self.baseline_qrs_amplitude_factor = 1.0
+    """
+    Manages the physiological effects on EKG parameters.
+    Stateless: the baselines and effect tables are module-level constants.
+    """
 
-    def update_ekg_parameters(self, physiological_state):
+    @staticmethod
+    def update_ekg_parameters(physiological_state):
         """
         Updates EKG parameters based on the current physiological state,
         simulating effects like hypovolemic shock and tension pneumothorax.
 
         Args:
-            physiological_state (dict): A dictionary containing current physiological data,
-                                      e.g., {'blood_volume_percent': 100, 
-                                             'heart_rate_bpm': 70,
-                                             'tension_pneumothorax_present': False,
-                                             'qrs_amplitude_factor': 1.0}.
+            physiological_state (PhysiologicalState): The current physiological data,
+                                      e.g., blood_volume_percent=100, heart_rate_bpm=70,
+                                      tension_pneumothorax_present=False, qrs_amplitude_factor=1.0.
 
         Returns:
             dict: A dictionary with target EKG parameters,
@@ -27,188 +253,45 @@ class PhysiologicalEffectsManager:
                          'target_st_depression_mv': new_st_depression,
                          'target_qrs_amplitude_factor': new_qrs_factor}.
         """
-        blood_volume_percent = physiological_state.get('blood_volume_percent', 100)
-        # Get current heart rate, which might have been affected by previous states (e.g. initial setting)
-        # or use a baseline if not set.
-        current_heart_rate = physiological_state.get('heart_rate_bpm', 70) 
-        
-        # Initialize with current values or defaults
-        target_heart_rate = current_heart_rate 
-        target_st_depression_mv = physiological_state.get('st_depression_mv', 0.0)
-        target_qrs_amplitude_factor = self.baseline_qrs_amplitude_factor
-
-        if blood_volume_percent > 90:
-            # Class I: No significant change
-            # Target HR remains base_heart_rate, ST depression = 0
-            pass # Already set
-        elif 75 <= blood_volume_percent <= 90:
-            # Class II: Mild shock
-            target_heart_rate = base_heart_rate * np.random.uniform(1.1, 1.2)
-            target_st_depression_mv = 0.05
-        elif 60 <= blood_volume_percent < 75:
-            # Class III: Moderate shock
-            target_heart_rate = base_heart_rate * np.random.uniform(1.2, 1.4)
-            target_st_depression_mv = 0.1
-        elif blood_volume_percent < 60:
-            # Class IV: Severe shock
-            target_heart_rate = base_heart_rate * np.random.uniform(1.4, 1.7)
-            # Cap heart rate to a maximum plausible value, e.g., 220 bpm
-            target_heart_rate = min(target_heart_rate, 220) 
-            target_st_depression_mv = 0.2
-        
-        # Tension Pneumothorax Logic
-        # This is applied *after* hypovolemia effects on HR, potentially overriding/enhancing them.
-        if physiological_state.get('tension_pneumothorax_present', False):
-            # Increase HR significantly due to tension pneumothorax
-            # Using max ensures it's at least the shock-induced HR or the pneumo-induced HR.
-            # The problem states: target_heart_rate = max(target_heart_rate, physiological_state.get('heart_rate_bpm', 70) * 1.5)
-            # Here, physiological_state.get('heart_rate_bpm', 70) is the *current* HR, not necessarily the original baseline.
-            # It's better to use the target_heart_rate calculated from hypovolemia as the base for this comparison.
-            pneumo_hr_effect = current_heart_rate * 1.5 # Tentative HR if pneumo was the ONLY factor on baseline
-            target_heart_rate = max(target_heart_rate, pneumo_hr_effect) 
-            target_heart_rate = max(target_heart_rate, 120) # Ensure it's at least 120 as a minimum for pneumo.
-            
-            target_qrs_amplitude_factor = 0.5  # Low voltage
-        else:
-            target_qrs_amplitude_factor = self.baseline_qrs_amplitude_factor # Normal voltage
-
-        # Ensure heart rate is an integer
-        target_heart_rate = int(round(target_heart_rate))
-        # Cap heart rate again after all effects
-        target_heart_rate = min(target_heart_rate, 220)
-
-        # Cap heart rate again after all effects
-        # target_heart_rate = min(target_heart_rate, 220) # This was already here, let's ensure it's applied after all HR mods
-
-        # TBI/ICP Logic
-        target_t_wave_amplitude_factor = physiological_state.get('t_wave_amplitude_factor', 1.0)
-        target_qt_duration_ms = physiological_state.get('qt_duration_ms', 440)
-        # Initialize st_elevation_mv which might be set by blast injury logic
-        target_st_elevation_mv = physiological_state.get('st_elevation_mv', 0.0)
-
-
-        if physiological_state.get('tbi_present', False) and physiological_state.get('icp_mmhg', 10) > 20:
-            # Bradycardia (Cushing Reflex)
-            # Ensure HR is low but not below a certain floor (e.g. 40), and respects other conditions.
-            # min(target_heart_rate, 55) will try to bring HR down if it's higher.
-            # max(40, ...) ensures it doesn't go too low.
-            target_heart_rate = max(40, min(target_heart_rate, 55))
-            
-            target_t_wave_amplitude_factor = 2.0  # Prominent T-waves
-            target_qt_duration_ms = 500  # QT Prolongation
-        else:
-            # Reset to baseline or current state if TBI/ICP condition not met
-            # This should ideally not overwrite if another condition (like blast) is setting them
-            if not physiological_state.get('blast_injury_present', False) or not physiological_state.get('coronary_age_suspected', False): # check if blast is not setting T-wave
-                target_t_wave_amplitude_factor = 1.0 
-            # Similar check for QT
-            if not physiological_state.get('blast_injury_present', False) or not physiological_state.get('coronary_age_suspected', False): # check if blast is not setting QT
-                target_qt_duration_ms = physiological_state.get('qt_duration_ms', 440) # or a more dynamic baseline
-
-        # Blast Injury/AGE Logic
-        # Initialize target_st_elevation_mv, default to current state or 0
-        # target_st_elevation_mv is already initialized above using physiological_state.get('st_elevation_mv', 0.0)
-        
-        if physiological_state.get('blast_injury_present', False) and \
-           physiological_state.get('coronary_age_suspected', False):
-            
-            # Tachycardia for AGE
-            target_heart_rate = max(target_heart_rate, 110) 
-            
-            # ST Elevation for MI-like pattern
-            target_st_elevation_mv = 0.2 
-            
-            # Precedence Logic: ST elevation overrides ST depression
-            if target_st_elevation_mv > 0:
-                target_st_depression_mv = 0.0
+        # Read the whole physiological state into locals once, as plain scalars rounded to
+        # the precision that matters, so that repeated states give the same cache key
+        ps = physiological_state
+        tension_pneumothorax_present = bool(ps.tension_pneumothorax_present)
+        # The current heart rate only matters for tension pneumothorax, leave it out of the key otherwise
+        current_heart_rate = round(float(ps.heart_rate_bpm), 1) if tension_pneumothorax_present else 0.0
+        tbi_present = bool(ps.tbi_present)
+        icp_mmhg = round(float(ps.icp_mmhg), 1)
+        blast_injury_present = bool(ps.blast_injury_present)
+        coronary_age_suspected = bool(ps.coronary_age_suspected)
+        t_wave_amplitude_factor = round(float(ps.t_wave_amplitude_factor), 2)
+        qt_duration_ms = round(float(ps.qt_duration_ms), 1)
+        st_elevation_mv = round(float(ps.st_elevation_mv), 2)
+        pr_interval_ms = round(float(ps.pr_interval_ms), 1)
+        qrs_duration_ms = round(float(ps.qrs_duration_ms), 1)
+        serum_k = round(float(ps.serum_k_meq_l), 2)
+        serum_ca_mg_dl = round(float(ps.serum_ca_mg_dl), 2)
+        temp_c = round(float(ps.core_body_temperature_celsius), 1)
+        ketamine_active = bool(ps.ketamine_active)
+        morphine_active = bool(ps.morphine_active)
+
+        # Blood volume only matters through its shock class, which is what goes in the key.
+        # The shock heart rate is drawn from a few levels, and only in the classes that
+        # have a range, so that the keys repeat.
+        shock_class = int(np.searchsorted(_SHOCK_THRESHOLDS, float(ps.blood_volume_percent), side='right'))
+        if _SHOCK_TABLE[shock_class, 1] > 0:
+            shock_hr_draw = _RNG.integers(_SHOCK_HR_DRAW_LEVELS) / _SHOCK_HR_DRAW_LEVELS
         else:
-            # If AGE is not suspected, st_elevation_mv should be 0 unless another condition sets it.
-            # For now, assume only AGE causes elevation.
-            target_st_elevation_mv = 0.0 
-            # target_st_depression_mv would have been determined by hypovolemia logic earlier,
-            # and should not be overridden here unless blast/AGE was active and is now not.
-
-        # Hyperkalemia Logic
-        serum_k = physiological_state.get('serum_k_meq_l', 4.0)
-        # target_t_wave_amplitude_factor is already initialized from previous logic or state
-        target_pr_ms = physiological_state.get('pr_interval_ms', 160)
-        target_qrs_ms = physiological_state.get('qrs_duration_ms', 100)
-
-        if serum_k > 5.5:  # Mild Hyperkalemia
-            target_t_wave_amplitude_factor = max(target_t_wave_amplitude_factor, 1.5)
-        if serum_k > 6.5:  # Moderate Hyperkalemia
-            target_t_wave_amplitude_factor = max(target_t_wave_amplitude_factor, 2.0)
-            target_pr_ms = 240
-            target_qrs_ms = 120
-            target_heart_rate = min(target_heart_rate, 70) # Apply bradycardic effect
-        if serum_k > 7.5:  # Severe Hyperkalemia
-            target_t_wave_amplitude_factor = max(target_t_wave_amplitude_factor, 2.5)
-            target_pr_ms = 300
-            target_qrs_ms = 160
-            target_heart_rate = min(target_heart_rate, 60) # More pronounced bradycardia
-
-        # Final HR cap
-        target_heart_rate = min(target_heart_rate, 220)
-
-        # Hypocalcemia Logic
-        serum_ca_mg_dl = physiological_state.get('serum_ca_mg_dl', 9.5)
-        # target_qt_duration_ms is already initialized from previous logic (e.g. TBI) or state
-        
-        # Use the current physiological_state's qt_duration_ms as the baseline for max comparison
-        # This ensures that if another condition (like TBI) has already prolonged QT, 
-        # hypocalcemia will only make it longer if its effect is greater.
-        current_qt_target_from_state = physiological_state.get('qt_duration_ms', 440)
-
-        if serum_ca_mg_dl < 7.0: # Severe Hypocalcemia
-            target_qt_duration_ms = max(current_qt_target_from_state, 520)
-        elif serum_ca_mg_dl < 8.5: # Mild Hypocalcemia
-            target_qt_duration_ms = max(current_qt_target_from_state, 480)
-        # Else (Normal Calcium): target_qt_duration_ms remains as determined by other conditions or baseline
-        # No explicit 'else' needed if we initialize target_qt_duration_ms with the value from other effects
-
-        # Hypothermia Logic
-        temp_c = physiological_state.get('core_body_temperature_celsius', 37.0)
-        target_osborn_wave_present = False
-        
-        # Use current physiological_state values as baseline for max comparisons for intervals
-        # This is critical to ensure hypothermia only prolongs if its effect is greater than existing conditions.
-        current_qt_from_state = physiological_state.get('qt_duration_ms', 440) 
-        current_pr_from_state = physiological_state.get('pr_interval_ms', 160)
-        current_qrs_from_state = physiological_state.get('qrs_duration_ms', 100)
-
-
-        if temp_c < 35.0:  # Mild Hypothermia
-            target_heart_rate = min(target_heart_rate, 60)
-            target_osborn_wave_present = True
-            target_pr_interval_ms = max(current_pr_from_state, 220)
-            target_qrs_duration_ms = max(current_qrs_from_state, 110)
-            target_qt_duration_ms = max(current_qt_from_state, 480)
-        if temp_c < 32.0:  # Moderate Hypothermia (effects are cumulative/overriding)
-            target_heart_rate = min(target_heart_rate, 50)
-            target_osborn_wave_present = True # Remains true
-            target_pr_interval_ms = max(current_pr_from_state, 240)
-            target_qrs_duration_ms = max(current_qrs_from_state, 120)
-            target_qt_duration_ms = max(current_qt_from_state, 500)
-        if temp_c < 28.0:  # Severe Hypothermia (effects are cumulative/overriding)
-            target_heart_rate = min(target_heart_rate, 40)
-            target_osborn_wave_present = True # Remains true
-            target_pr_interval_ms = max(current_pr_from_state, 280)
-            target_qrs_duration_ms = max(current_qrs_from_state, 140)
-            target_qt_duration_ms = max(current_qt_from_state, 550)
-
-        # Drug Effects Logic
-        ketamine_effect_hr_increase = 20
-        morphine_effect_hr_decrease = 15
-
-        if physiological_state.get('ketamine_active', False):
-            target_heart_rate += ketamine_effect_hr_increase
-        
-        if physiological_state.get('morphine_active', False):
-            target_heart_rate -= morphine_effect_hr_decrease
-        
-        # Clamping Heart Rate after all effects are applied
-        target_heart_rate = max(30, min(target_heart_rate, 250))
+            shock_hr_draw = 0.0
 
+        (target_heart_rate, target_st_depression_mv, target_qrs_amplitude_factor,
+         target_t_wave_amplitude_factor, target_qt_duration_ms, target_st_elevation_mv,
+         target_pr_interval_ms, target_qrs_duration_ms, target_osborn_wave_present) = _cached_targets((
+            shock_class, current_heart_rate, shock_hr_draw,
+            tension_pneumothorax_present, tbi_present, icp_mmhg,
+            blast_injury_present, coronary_age_suspected,
+            t_wave_amplitude_factor, qt_duration_ms, st_elevation_mv,
+            pr_interval_ms, qrs_duration_ms,
+            serum_k, serum_ca_mg_dl, temp_c, ketamine_active, morphine_active))
 
         return {
             'target_heart_rate': target_heart_rate,
@@ -221,5 +304,3 @@ class PhysiologicalEffectsManager:
             'target_qrs_duration_ms': target_qrs_duration_ms, 
             'target_osborn_wave_present': target_osborn_wave_present
         }
-
-```
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class PhysiologicalState:
+    """
+    Current physiological state of the simulated casualty,
+    together with the EKG parameters derived from it.
+    Attribute access avoids the per-read hashing of a dict lookup.
+    """
+    blood_volume_percent: float = 100
+    heart_rate_bpm: int = 70
+    st_depression_mv: float = 0.0
+    tension_pneumothorax_present: bool = False
+    qrs_amplitude_factor: float = 1.0
+    tbi_present: bool = False
+    icp_mmhg: int = 10
+    t_wave_amplitude_factor: float = 1.0
+    qt_duration_ms: int = 440
+    blast_injury_present: bool = False
+    coronary_age_suspected: bool = False
+    st_elevation_mv: float = 0.0
+    serum_k_meq_l: float = 4.0
+    pr_interval_ms: int = 160
+    qrs_duration_ms: int = 100
+    serum_ca_mg_dl: float = 9.5
+    core_body_temperature_celsius: float = 37.0
+    osborn_wave_present: bool = False
+    ketamine_active: bool = False
+    morphine_active: bool = False
@@ -0,0 +1,69 @@
+import numpy as np
+
+class RingBuffer:
+    def __init__(self, capacity, dtype=np.float32):
+        """
+        Fixed-size circular buffer of samples.
+        Once full, appending overwrites the oldest samples in place, so no
+        memory is allocated after construction.
+        """
+        self.data = np.empty(capacity, dtype=dtype)
+        self.head = 0 # Index where the next sample will be written
+        self.filled = 0 # Number of valid samples in the buffer
+
+    def __len__(self):
+        return self.filled
+
+    @property
+    def capacity(self):
+        return len(self.data)
+
+    def is_full(self):
+        return self.filled == len(self.data)
+
+    def append(self, segment):
+        """
+        Copies a data segment into the buffer,
+        wrapping around to the start of the buffer when the end is reached.
+        """
+        capacity = len(self.data)
+        seg_len = len(segment)
+        if seg_len >= capacity:
+            # Segment covers the whole buffer, keep only its most recent samples
+            self.data[:] = segment[-capacity:]
+            self.head = 0
+            self.filled = capacity
+            return
+
+        n1 = min(seg_len, capacity - self.head)
+        self.data[self.head:self.head + n1] = segment[:n1]
+        self.data[:seg_len - n1] = segment[n1:]
+        self.head = (self.head + seg_len) % capacity
+        self.filled = min(self.filled + seg_len, capacity)
+
+    def get(self):
+        """
+        Returns the buffered samples in chronological order (oldest first).
+        This is a view while the buffer has not wrapped yet, otherwise a new array.
+        """
+        if self.filled < len(self.data):
+            # Buffer has not wrapped yet, so valid samples start at index 0
+            return self.data[:self.filled]
+        return np.concatenate((self.data[self.head:], self.data[:self.head]))
+
+    def copy_to(self, out):
+        """
+        Copies the buffered samples in chronological order into out, which must
+        hold at least capacity samples, without allocating a new array.
+        Returns the part of out that was filled.
+        """
+        capacity = len(self.data)
+        if self.filled < capacity:
+            np.copyto(out[:self.filled], self.data[:self.filled])
+            return out[:self.filled]
+
+        # Unroll the ring: oldest samples (from head to the end) first
+        k = capacity - self.head
+        np.copyto(out[:k], self.data[self.head:])
+        np.copyto(out[k:capacity], self.data[:self.head])
+        return out[:capacity]
@@ -0,0 +1,90 @@
+import numpy as np
+from vispy import app, scene
+from .base_plotter import BasePlotter
+
+class VispyDynamicPlotter(BasePlotter):
+    def __init__(self, ekg_simulator_instance):
+        """
+        Vispy (OpenGL) implementation of the real-time EKG display.
+        Scales to many more points than Matplotlib's Agg backend, e.g. for multi-lead traces.
+        """
+        super().__init__(ekg_simulator_instance)
+        self.canvas = None
+        self.view = None
+        self.line = None
+        self.status_annotation = None # Routine readouts (HR, ST depression, electrolytes, drugs)
+        self.alert_annotation = None # Abnormal findings, drawn in red
+        self._pos = None # (N, 2) vertex array shared with the line visual
+        self._timer = None
+
+    def setup_plot(self, num_leads=1, sampling_rate=100):
+        self.sampling_rate = sampling_rate
+        self.canvas = scene.SceneCanvas(title="Real-time EKG Signal", size=(800, 600), bgcolor='white')
+        grid = self.canvas.central_widget.add_grid()
+        self.view = grid.add_view(row=0, col=1)
+        self.view.camera = scene.PanZoomCamera(rect=(0, self._ylim[0], self.display_seconds, self._ylim[1] - self._ylim[0]))
+
+        # AxisWidget passes its keyword arguments on to AxisVisual, so the size limits are set afterwards
+        y_axis = scene.AxisWidget(orientation='left', axis_label='Amplitude', axis_color='black', text_color='black')
+        y_axis.width_max = 60
+        grid.add_widget(y_axis, row=0, col=0)
+        y_axis.link_view(self.view)
+        x_axis = scene.AxisWidget(orientation='bottom', axis_label='Time (s)', axis_color='black', text_color='black')
+        x_axis.height_max = 50
+        grid.add_widget(x_axis, row=1, col=1)
+        x_axis.link_view(self.view)
+
+        # Preallocate the ring buffer for one display window
+        self._setup_buffer()
+        # The x coordinates never change, only the y column is rewritten each frame
+        self._pos = np.zeros((len(self._time_full), 2), dtype=np.float32)
+        self._pos[:, 0] = self._time_full
+        self.line = scene.visuals.Line(pos=self._pos[:1], color='#1f77b4', width=2, parent=self.view.scene)
+
+        # Annotations are two Text visuals created once, positioned in canvas pixels
+        width = self.canvas.size[0]
+        self.status_annotation = scene.visuals.Text('', color='black', font_size=9, face='Courier New',
+                                                    anchor_x='left', anchor_y='top', pos=(80, 20), parent=self.canvas.scene)
+        self.alert_annotation = scene.visuals.Text('', color='red', font_size=9, face='Courier New',
+                                                   anchor_x='right', anchor_y='top', pos=(width - 20, 20), parent=self.canvas.scene)
+
+        # Placeholder for multi-lead, not implemented in this phase
+        if num_leads > 1:
+            print("Warning: Multi-lead display is not fully implemented in this version.")
+
+    def _draw_annotation(self, key, text):
+        annotation = self.status_annotation if key == 'status' else self.alert_annotation
+        annotation.text = text
+
+    def _on_timer(self, event):
+        # Pull new data and, when due, refresh the annotations
+        if self._poll_simulator():
+            # Unroll the ring buffer straight into the y column of the vertex array
+            num_points = len(self._buffer.copy_to(self._pos[:, 1]))
+            self.line.set_data(pos=self._pos[:num_points])
+
+        # Same y-range rule as the Matplotlib plotter, keeping the scaled waveform visible
+        ylim = self._next_ylim()
+        if ylim != self._ylim:
+            self.view.camera.rect = (0, ylim[0], self.display_seconds, ylim[1] - ylim[0])
+            self._ylim = ylim
+
+        self.canvas.update()
+
+    def start_animation(self):
+        if self.canvas is None:
+            print("Error: Plot not set up. Call setup_plot() first.")
+            return
+
+        # Timer interval is linked to the data generation frequency, as for the Matplotlib plotter
+        self._timer = app.Timer(interval=self.ekg_simulator_instance.simulation_time_step_seconds,
+                                connect=self._on_timer, start=False)
+        try:
+            self.canvas.show()
+            self._timer.start()
+            app.run()
+        except Exception as e:
+            print(f"Error displaying plot: {e}")
+            print("Ensure a Vispy GUI backend is installed, e.g. 'pip install pyqt5'.")
+        finally:
+            self._timer.stop()
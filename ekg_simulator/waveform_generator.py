@@ -1,9 +1,159 @@
-import neurokit2 as nk
+import math
+from functools import lru_cache
 import numpy as np
+from .numba_compat import njit, NUMBA_AVAILABLE
+
+# Heart rates of the precomputed beat templates. Every heart rate is drawn from the
+# nearest template, stretched to its exact RR interval.
+_BANK_MIN_HEART_RATE = 40
+_BANK_MAX_HEART_RATE = 200
+_BANK_HEART_RATE_STEP = 10
+
+# McSharry et al. ECGSYN model parameters for the P, Q, R, S and T waves (as in neurokit2):
+# angles of the extrema on the limit cycle (degrees), their z amplitudes and Gaussian widths (radians)
+_ECGSYN_TI_DEGREES = np.array([-70.0, -15.0, 0.0, 15.0, 100.0])
+_ECGSYN_AI = np.array([1.2, -5.0, 30.0, -7.5, 0.75])
+_ECGSYN_BI = np.array([0.25, 0.1, 0.1, 0.1, 0.4])
+_ECGSYN_INTERNAL_RATE = 1000 # Hz, integration rate; the QRS Gaussians are only ~15 ms wide
+
+@njit(cache=True, fastmath=True)
+def _ecgsyn_derivatives(x, y, z, w0, ti, ai, bi):
+    """
+    Right-hand side of the ECGSYN ODE (without respiratory baseline wander).
+    """
+    theta = math.atan2(y, x)
+    a0 = 1.0 - math.sqrt(x * x + y * y)
+    dz = -z
+    for i in range(len(ti)):
+        # Angle to each extremum, wrapped to [-pi, pi]
+        dti = theta - ti[i]
+        dti -= round(dti / (2 * math.pi)) * 2 * math.pi
+        dz -= ai[i] * dti * math.exp(-0.5 * (dti / bi[i]) ** 2)
+    return a0 * x - w0 * y, a0 * y + w0 * x, dz
+
+@njit(cache=True, fastmath=True)
+def _ecgsyn_beat(beat_length, num_beats, substeps, sampling_rate, ti, ai, bi):
+    """
+    Integrates the ECGSYN model with fixed-step RK4 for num_beats beats of exactly
+    beat_length samples, starting on the R peak. Returns the unscaled z trace of the
+    last beat, R peak to R peak inclusive (beat_length + 1 samples at sampling_rate).
+    """
+    dt = 1.0 / (sampling_rate * substeps)
+    w0 = 2 * math.pi * sampling_rate / beat_length # One revolution per beat_length samples
+    x, y, z = 1.0, 0.0, 0.04 # On the limit cycle at the R peak (theta = 0)
+    beat = np.empty(beat_length + 1)
+    first_sample = (num_beats - 1) * beat_length
+    for n in range(num_beats * beat_length + 1):
+        if n >= first_sample:
+            beat[n - first_sample] = z
+        for _ in range(substeps):
+            k1x, k1y, k1z = _ecgsyn_derivatives(x, y, z, w0, ti, ai, bi)
+            k2x, k2y, k2z = _ecgsyn_derivatives(x + 0.5 * dt * k1x, y + 0.5 * dt * k1y, z + 0.5 * dt * k1z, w0, ti, ai, bi)
+            k3x, k3y, k3z = _ecgsyn_derivatives(x + 0.5 * dt * k2x, y + 0.5 * dt * k2y, z + 0.5 * dt * k2z, w0, ti, ai, bi)
+            k4x, k4y, k4z = _ecgsyn_derivatives(x + dt * k3x, y + dt * k3y, z + dt * k3z, w0, ti, ai, bi)
+            x += dt / 6 * (k1x + 2 * k2x + 2 * k3x + k4x)
+            y += dt / 6 * (k1y + 2 * k2y + 2 * k3y + k4y)
+            z += dt / 6 * (k1z + 2 * k2z + 2 * k3z + k4z)
+    return beat
+
+def _simulate_beat_ecgsyn(heart_rate, sampling_rate, beat_length):
+    """
+    One beat from the compiled ECGSYN port, scaled to -0.4..1.2 mV like neurokit2's output.
+    """
+    # Adjust the extrema for the heart rate, as ECGSYN does
+    hr_factor = math.sqrt(heart_rate / 60)
+    hr_factor2 = math.sqrt(hr_factor)
+    ti = np.array([hr_factor2, hr_factor, 1.0, hr_factor, hr_factor2]) * np.deg2rad(_ECGSYN_TI_DEGREES)
+    bi = hr_factor * _ECGSYN_BI
+
+    # Enough beats for the z transient (time constant 1 s) to die out
+    num_beats = max(3, math.ceil(5 * heart_rate / 60)) + 1
+    substeps = max(1, math.ceil(_ECGSYN_INTERNAL_RATE / sampling_rate))
+    beat = _ecgsyn_beat(beat_length, num_beats, substeps, float(sampling_rate), ti, _ECGSYN_AI, bi)
+    return (beat - beat.min()) * 1.6 / (beat.max() - beat.min()) - 0.4
+
+def _generate_via_neurokit(heart_rate, sampling_rate, beat_length):
+    """
+    One beat cut out of a neurokit2 ecgsyn simulation (used when numba is not available).
+    """
+    # Imported here so neurokit2 (and its pandas/scipy dependencies) is only loaded
+    # when this fallback is actually used
+    import neurokit2 as nk
+
+    # Simulate a few clean beats so one can be taken after the start-up transient
+    ekg_signal = nk.ecg_simulate(
+        duration=max(5, 6 * 60 / heart_rate),
+        sampling_rate=sampling_rate,
+        heart_rate=heart_rate,
+        heart_rate_std=0,
+        noise=0,
+        method="ecgsyn", # ecgsyn is known to vary QT/PR/QRS with HR
+        random_state=0
+    )
+    _, peaks_info = nk.ecg_peaks(ekg_signal, sampling_rate=sampling_rate)
+    r_peaks = peaks_info["ECG_R_Peaks"]
+
+    # The peak detector can skip beats at very high heart rates, so it only provides the start
+    start = r_peaks[len(r_peaks) // 2]
+    if start + beat_length >= len(ekg_signal):
+        start = r_peaks[0]
+    return ekg_signal[start:start + beat_length + 1]
+
+def _simulate_beat(heart_rate, sampling_rate):
+    """
+    Returns one PQRST beat of the ECGSYN model, from an R peak up to and including
+    the next R peak, as float32. The closing sample lets interpolation wrap around the beat.
+    """
+    # The beat length comes from the nominal RR interval
+    beat_length = int(round(60 * sampling_rate / heart_rate))
+    if NUMBA_AVAILABLE:
+        beat = _simulate_beat_ecgsyn(heart_rate, sampling_rate, beat_length)
+    else:
+        # Integrating the model in plain Python is slower than neurokit2's solver
+        beat = _generate_via_neurokit(heart_rate, sampling_rate, beat_length)
+    # float32 is ample for display and halves the bytes of every copy downstream
+    return np.ascontiguousarray(beat, dtype=np.float32)
+
+@lru_cache(maxsize=4)
+def _get_template_bank(sampling_rate):
+    """
+    Returns the beat templates for every heart rate of the bank at this sampling rate.
+    Built once, on the first segment requested (the initial display window), so the
+    ecgsyn ODE is never integrated while the simulation is running.
+    """
+    return tuple(_simulate_beat(heart_rate, sampling_rate)
+                 for heart_rate in range(_BANK_MIN_HEART_RATE, _BANK_MAX_HEART_RATE + 1, _BANK_HEART_RATE_STEP))
+
+@lru_cache(maxsize=256)
+def _get_scaled_template(sampling_rate, bank_index, qrs_amplitude_factor, t_wave_amplitude_factor, st_shift_mv):
+    """
+    Returns a bank template with the amplitude factors and the ST shift already applied.
+    The caller rounds the parameters to 0.01, so each parameter change builds one new
+    template and every segment after that is a plain interpolated copy of it.
+    Scaling and shifting commute with the linear interpolation, so the result is the same
+    as applying them to each segment.
+    """
+    beat_template = _get_template_bank(sampling_rate)[bank_index]
+
+    # Apply QRS and T-wave amplitude factors first, as ST changes are additive.
+    # Simple approach: scale the entire signal for QRS amplitude.
+    # Very rough approximation for T-wave amplitude change: scale entire signal slightly.
+    # This is a placeholder due to ecgsyn limitations for specific wave component scaling.
+    # A more accurate implementation would require signal delineation and targeted scaling.
+    simplified_t_wave_scaling = 1.0 + ( (t_wave_amplitude_factor - 1.0) * 0.1 ) # e.g. factor 2.0 -> 1.1, factor 0.5 -> 0.95
+    # Scalars are float32 so the float32 template is never promoted to float64
+    total_scale = np.float32(qrs_amplitude_factor * simplified_t_wave_scaling)
+    return beat_template * total_scale + np.float32(st_shift_mv)
 
 class WaveformGenerator:
     def __init__(self):
-        pass
+        """
+        Generates EKG segments by repeating one-beat templates from a precomputed bank.
+        """
+        # Position within the current beat (0 to 1), carried across segments
+        # so consecutive segments join without a phase jump
+        self._beat_phase = 0.0
+        self._samples_per_beat = None # RR interval in samples of the last generated segment
 
     def get_ekg_segment(self, duration_seconds=10, sampling_rate=100, heart_rate=70, 
                         st_depression_mv=0.0, st_elevation_mv=0.0, qrs_amplitude_factor=1.0,
@@ -11,41 +161,30 @@ class WaveformGenerator:
                         target_pr_interval_ms=160, target_qrs_duration_ms=100,
                         osborn_wave_present=False):
         """
-        Generates an EKG signal segment.
+        Generates an EKG signal segment as a float32 array.
         Includes placeholders for ST depression/elevation, QRS/T-wave amp, QT/PR/QRS duration, Osborn waves.
         """
         # print(f"WaveformGenerator: HR={heart_rate}, QT_target={target_qt_duration_ms}, T_amp_factor={t_wave_amplitude_factor}")
-        ekg_signal = nk.ecg_simulate(
-            duration=duration_seconds,
-            sampling_rate=sampling_rate,
-            heart_rate=heart_rate,
-            method="ecgsyn" # ecgsyn is known to vary QT/PR/QRS with HR
-        )
+        # Nearest template in the bank, with the amplitude factors and ST shift baked in
+        beat_template = _get_scaled_template(sampling_rate, *self.template_parameters(
+            sampling_rate, heart_rate, st_depression_mv, st_elevation_mv,
+            qrs_amplitude_factor, t_wave_amplitude_factor))
+        template_length = len(beat_template) - 1 # Without the closing sample
 
-        # Apply QRS and T-wave amplitude factors first, as ST changes are additive
-        if qrs_amplitude_factor != 1.0:
-            # Simple approach: scale the entire signal for QRS amplitude.
-            ekg_signal = ekg_signal * qrs_amplitude_factor
-            
-        if t_wave_amplitude_factor != 1.0:
-            # Very rough approximation for T-wave amplitude change: scale entire signal slightly.
-            # This is a placeholder due to ecgsyn limitations for specific wave component scaling.
-            # A more accurate implementation would require signal delineation and targeted scaling.
-            # Example: If t_wave_amplitude_factor is 2.0, scale signal by 1.1 (10% increase)
-            # This is a very simplified approach.
-            simplified_t_wave_scaling = 1.0 + ( (t_wave_amplitude_factor - 1.0) * 0.1 ) # e.g. factor 2.0 -> 1.1, factor 0.5 -> 0.95
-            if simplified_t_wave_scaling != 1.0 :
-                ekg_signal = ekg_signal * simplified_t_wave_scaling
-            # print(f"Note: T-wave amplitude factor ({t_wave_amplitude_factor}) applied as simplified global scaling ({simplified_t_wave_scaling:.2f}). This is a placeholder.")
-
-        # ST Segment Modification Logic
-        if st_elevation_mv > 0:
-            # print(f"Applying ST elevation: {st_elevation_mv} mV")
-            ekg_signal += st_elevation_mv  # Global upward shift
-        elif st_depression_mv > 0: # Check for depression only if no elevation
-            # print(f"Applying ST depression: {st_depression_mv} mV")
-            ekg_signal -= st_depression_mv  # Global downward shift
+        # Stretch the beat to the exact RR interval: the beat phase advances by
+        # 1 / samples_per_beat per output sample, continuing from where the last segment ended
+        num_samples = int(round(duration_seconds * sampling_rate))
+        samples_per_beat = 60 * sampling_rate / heart_rate
+        self._samples_per_beat = samples_per_beat
+        phases = (self._beat_phase + np.arange(num_samples) / samples_per_beat) % 1.0
+        self._beat_phase = (self._beat_phase + num_samples / samples_per_beat) % 1.0
 
+        # Linear interpolation between neighbouring template samples, in float32
+        position = phases * template_length
+        index = np.minimum(position.astype(np.intp), template_length - 1)
+        fraction = (position - index).astype(np.float32)
+        ekg_signal = beat_template[index]
+        ekg_signal += fraction * (beat_template[index + 1] - ekg_signal)
 
         # QT Duration Note
         # NeuroKit2's ecgsyn method inherently adjusts the QT interval based on the heart rate.
@@ -62,3 +201,57 @@ class WaveformGenerator:
              # print(f"Note: Target QRS duration set to {target_qrs_duration_ms}ms. Actual QRS is primarily influenced by heart rate ({heart_rate}bpm) in the 'ecgsyn' model.")
             
         return ekg_signal
+
+    def template_parameters(self, sampling_rate=100, heart_rate=70, st_depression_mv=0.0, st_elevation_mv=0.0,
+                            qrs_amplitude_factor=1.0, t_wave_amplitude_factor=1.0, **unused_parameters):
+        """
+        Returns the (bank index, QRS factor, T-wave factor, ST shift) that select the beat
+        template, quantized as the template cache is. Two parameter sets with the same
+        template parameters give the same beat shape; only the RR stretch may differ.
+        """
+        # ST Segment Modification Logic
+        # Global shift. PhysiologicalEffectsManager clears ST depression whenever it sets
+        # ST elevation (elevation takes precedence), so at most one of them is non-zero.
+        st_shift_mv = st_elevation_mv - st_depression_mv
+
+        # Rates outside the bank use the first or last template
+        num_templates = len(_get_template_bank(sampling_rate))
+        bank_index = int(round((heart_rate - _BANK_MIN_HEART_RATE) / _BANK_HEART_RATE_STEP))
+        return (min(max(bank_index, 0), num_templates - 1),
+                round(float(qrs_amplitude_factor), 2),
+                round(float(t_wave_amplitude_factor), 2),
+                round(float(st_shift_mv), 2))
+
+    def get_ekg_segments(self, num_segments, duration_seconds=0.1, sampling_rate=100, heart_rate=70,
+                         st_depression_mv=0.0, st_elevation_mv=0.0, qrs_amplitude_factor=1.0,
+                         t_wave_amplitude_factor=1.0, target_qt_duration_ms=440,
+                         target_pr_interval_ms=160, target_qrs_duration_ms=100,
+                         osborn_wave_present=False):
+        """
+        Generates num_segments consecutive segments with the same parameters in one pass.
+        Returns a (num_segments, samples per segment) float32 array whose rows follow on
+        from each other, so they can be handed out one simulation time step at a time.
+        """
+        segment_length = int(round(duration_seconds * sampling_rate))
+        ekg_signal = self.get_ekg_segment(
+            duration_seconds=num_segments * segment_length / sampling_rate,
+            sampling_rate=sampling_rate,
+            heart_rate=heart_rate,
+            st_depression_mv=st_depression_mv,
+            st_elevation_mv=st_elevation_mv,
+            qrs_amplitude_factor=qrs_amplitude_factor,
+            t_wave_amplitude_factor=t_wave_amplitude_factor,
+            target_qt_duration_ms=target_qt_duration_ms,
+            target_pr_interval_ms=target_pr_interval_ms,
+            target_qrs_duration_ms=target_qrs_duration_ms,
+            osborn_wave_present=osborn_wave_present
+        )
+        return ekg_signal.reshape(num_segments, segment_length)
+
+    def rewind(self, num_samples):
+        """
+        Moves the beat phase back over the last num_samples generated, e.g. when the end
+        of a batch of segments is discarded unused, so the next segment continues the trace.
+        """
+        if self._samples_per_beat is not None:
+            self._beat_phase = (self._beat_phase - num_samples / self._samples_per_beat) % 1.0